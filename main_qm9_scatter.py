@@ -249,7 +249,8 @@ class QM9Trainer(BaseJaxTrainer):
         print('Computing dataset statistics...')
         ys = []
         for data in tqdm(dataloader):
-            ys.append(data['y'])
+            # copy: collate returns views into reusable staging buffers
+            ys.append(np.array(data['y']))
         ys = jnp.concatenate(ys)
         self.shift = jnp.mean(ys)
         self.scale = jnp.std(ys)
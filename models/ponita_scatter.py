@@ -211,6 +211,9 @@ class Ponita(nn.Module):
         return spatial_invariants, orientation_invariants
 
     def __call__(self, pos, x, edge_index, batch=None):
+        # Node features travel through the data pipeline as packed one-hot
+        # bool/uint8 (1 byte per entry); cast to float only here on device
+        x = x.astype(pos.dtype)
         ori_grid = self.ori_grid.astype(pos.dtype)
         spatial_invariants, orientation_invariants = self.compute_invariants(ori_grid, pos, edge_index)
 